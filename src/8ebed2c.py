@@ -9,10 +9,10 @@
 Language version 1.1.  Implementation version 2021.0621.
 
 The @testprog syntax can be used to acquire input from the
-specified attribute of the Tests class of the tests module.
+specified test program of the Tests class of the tests module.
 
 Using a single hyphen for the output filename will send
-the generated C source to stdout.\
+the generated C source to stdout (so it cannot be compiled.)\
 """
 
 import logging
@@ -36,9 +36,10 @@ def main(argv):
                          action="store_true", dest="compile", default=False,
                          help="compile generated C code")
     optparser.add_option("-e", "--c-compiler", metavar='EXECUTABLE',
-                         dest="compiler", default="gcc",
+                         dest="compiler", default=None,
                          help="specify program to use for compiling C "
-                              "(default: %default)")
+                              "(default: gcc, or in interactive mode, "
+                              "tcc if it is installed)")
     optparser.add_option("-f", "--pointer-format", metavar='FORMAT',
                          dest="pointer_format", default="$%08lx",
                          help="printf format to use for pointers in "
@@ -84,6 +85,8 @@ def main(argv):
     if options.interactive:
         cmdline(options)
         sys.exit(0)
+    if options.compiler is None:
+        options.compiler = "gcc"
     try:
         infilename = args[0]
         outfilename = args[1]
@@ -91,7 +94,10 @@ def main(argv):
         print("Usage: {}\n".format(__doc__))
         print("Run with the -h option to see a list of all options.")
         sys.exit(1)
-    parse_and_gen(options, infilename, outfilename, tests=tests.Tests)
+    if options.compile and outfilename == '-':
+        optparser.error("cannot compile C source sent to stdout; "
+                        "give an output filename")
+    parse_and_gen(options, infilename, outfilename, tests=tests.programs)
     if options.compile:
         result = compile_and_run(outfilename, options)
         sys.stdout.write(result)
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+# Augmenting declarations used when context.py is compiled with Cython
+# (see setup.py.)  context.py itself remains plain, importable Python.
+
+cdef class Context(dict):
+    cdef public object parent
+
+    cpdef lookup(self, str name, object default=*, object _get=*)
+    cpdef declare(self, str name, object value)
+    cpdef empty(self)
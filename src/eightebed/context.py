@@ -5,7 +5,6 @@ Contexts.  Can be used for type checking and other static analysis.
 """
 
 notset = object()
-isset = object()
 
 
 class Context(dict):
@@ -16,6 +15,9 @@ class Context(dict):
     4
     >>> e.lookup('b')
     3
+    >>> f = Context(parent=e)
+    >>> f.lookup('a')
+    2
     >>> e.lookup('e', None) is None
     True
     >>> e.lookup('e')
@@ -41,28 +43,36 @@ class Context(dict):
 
     """
 
-    def __init__(self, initial={}, parent=None):
-        dict.__init__(self, initial)
+    __slots__ = ('parent',)
+
+    def __init__(self, initial=None, parent=None):
+        dict.__init__(self, initial or ())
         self.parent = parent
 
-    def lookup(self, name, default=notset):
-        if name in self:
-            return self[name]
-        if self.parent is None:
-            if default is notset:
-                raise KeyError(name)
-            return default
-        return self.parent.lookup(name, default=default)
+    def lookup(self, name, default=notset, _get=dict.get):
+        ctx = self
+        while ctx is not None:
+            value = _get(ctx, name, notset)
+            if value is not notset:
+                return value
+            ctx = ctx.parent
+        if default is notset:
+            raise KeyError(name)
+        return default
 
     def declare(self, name, value):
-        if self.lookup(name, default=isset) is not isset:
-            raise KeyError("%s already declared" % name)
+        ctx = self
+        while ctx is not None:
+            if name in ctx:
+                raise KeyError("%s already declared" % name)
+            ctx = ctx.parent
         self[name] = value
 
     def empty(self):
-        self.clear()
-        if self.parent is not None:
-            self.parent.empty()
+        ctx = self
+        while ctx is not None:
+            dict.clear(ctx)
+            ctx = ctx.parent
 
     def __repr__(self):
         return "Context(%s, parent=%s)" % (
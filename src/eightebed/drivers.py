@@ -9,58 +9,133 @@ import logging
 import os
 import sys
 
-from pprint import pprint
-from subprocess import Popen, PIPE
-
-from eightebed.parser import parse
+from functools import partial
+from subprocess import call
+from tempfile import TemporaryFile
+try:
+    # Python 2
+    from cStringIO import StringIO
+except ImportError:
+    # Python 3
+    from io import StringIO
+try:
+    from shutil import which
+except ImportError:
+    # Python 2
+    from distutils.spawn import find_executable as which
+try:
+    from functools import lru_cache
+except ImportError:
+    # Python 2: just don't cache
+    def lru_cache(maxsize=128):
+        return lambda f: f
+
+from eightebed.parser import parse, read_file
 from eightebed.context import Context
 
 
 logger = logging.getLogger("main")
 
 
-def parse_and_check(program_text, options=None):
-    ast = parse(program_text)
-    if options is not None and options.dump_ast:
-        pprint(ast)
+def _check(ast):
     ast.typecheck(Context(), Context())
     ast.vanalyze(Context())
     return ast
 
 
+@lru_cache(maxsize=128)
+def _parse_and_check(program_text):
+    return _check(parse(program_text))
+
+
+def parse_and_check(program_text, options=None):
+    if options is not None and options.dump_ast:
+        # dump before checking, as the dump matters most when that fails
+        from pprint import pprint
+        ast = parse(program_text)
+        pprint(ast)
+        return _check(ast)
+    return _parse_and_check(program_text)
+
+
 def parse_and_gen(options, infilename, outfilename, tests=None):
     if infilename.startswith('@') and tests is not None:
-        program_text = getattr(tests, infilename[1:])
+        program_text = tests[infilename[1:]]
     else:
-        infile = open(infilename, "r")
-        program_text = infile.read()
-        infile.close()
+        program_text = read_file(infilename)
     logger.info("Parsing...")
     ast = parse_and_check(program_text, options=options)
+    logger.info("Generating...")
+    buffer = StringIO()
+    ast.emit(buffer, options)
     if outfilename == '-':
-        outfile = sys.stdout
+        sys.stdout.write(buffer.getvalue())
     else:
-        outfile = open(outfilename, "w")
-    logger.info("Generating...")
-    ast.emit(outfile, options)
-    outfile.close()
-
-
-def compile_and_run(filename, options):
+        fd = os.open(outfilename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                     0o666)
+        try:
+            data = buffer.getvalue().encode('utf-8')
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+
+
+def run_program(args, stdin_data=None, stdout=None):
+    """Run a program to completion and return its exit status.  The
+    bytes in stdin_data, if any are given, are fed to it as its standard
+    input from a temporary file rather than through a pipe."""
+    if stdin_data is None:
+        return call(args, stdout=stdout)
+    stdin = TemporaryFile()
+    try:
+        stdin.write(stdin_data)
+        stdin.seek(0)
+        return call(args, stdin=stdin, stdout=stdout)
+    finally:
+        stdin.close()
+
+
+def run_captured(args):
+    """Run a program to completion and return what it wrote to its
+    standard output.  The output goes through a temporary file rather
+    than a pipe, so that no reader thread is needed to shuttle it."""
+    stdout = TemporaryFile()
+    try:
+        run_program(args, stdout=stdout)
+        stdout.seek(0)
+        return stdout.read()
+    finally:
+        stdout.close()
+
+
+def compile_and_run(filename, options, source=None):
+    """Compile the C source in the named file, or, if the source text
+    is given instead (with filename None), feed it to the compiler on
+    its standard input; then run the result, if asked to."""
     # a bit of a hack
     a_out = './a.out'
     if sys.platform == 'cygwin':
         a_out = './a.exe'
 
     logger.info("Compiling...")
-    output = Popen([options.compiler, filename], stdout=PIPE).communicate()[0]
+    if source is not None:
+        args = [options.compiler, '-x', 'c', '-o', a_out, '-']
+        stdin_data = source.encode('utf-8')
+    else:
+        args = [options.compiler, '-o', a_out, filename]
+        stdin_data = None
     if options.verbose:
-        sys.stdout.write(output)
-    if output not in ('', b''):
+        status = run_program(args, stdin_data=stdin_data)
+    else:
+        with open(os.devnull, 'w') as devnull:
+            status = run_program(args, stdin_data=stdin_data, stdout=devnull)
+    if status != 0:
         raise RuntimeError("Compilation failed!")
+    output = ''
     if options.run:
         logger.info("Running...")
-        output = Popen([a_out], stdout=PIPE).communicate()[0]
+        output = run_captured([a_out])
         try:
             # Python 2
             output = unicode(output).encode('ascii')
@@ -68,25 +143,28 @@ def compile_and_run(filename, options):
             # Python 3
             output = output.decode('ascii')
     if options.clean:
-        os.remove(filename)
+        if filename is not None:
+            os.remove(filename)
         os.remove(a_out)
     return output
 
 
+class LoadAndGoOptions(object):
+    __slots__ = ()
+    verbose = False
+    run = True
+    clean = True
+    compiler = "gcc"
+    pedigree = __file__ + ":load_and_go"
+    trace_marking = False
+    pointer_format = "$%08lx"
+
+
 def load_and_go(ast, options=None):
-    class LoadAndGoOptions(object):
-        verbose = False
-        run = True
-        clean = True
-        compiler = "gcc"
-        pedigree = __file__ + ":load_and_go"
-        trace_marking = False
-        pointer_format = "$%08lx"
     options = options or LoadAndGoOptions()
-    file = open("tmp.c", "w")
-    ast.emit(file, options)
-    file.close()
-    return compile_and_run("tmp.c", options)
+    buffer = StringIO()
+    ast.emit(buffer, options)
+    return compile_and_run(None, options, source=buffer.getvalue())
 
 
 def cmdline(options):
@@ -94,13 +172,23 @@ def cmdline(options):
     print("Eightebed interactive!  Type 'quit' to quit.")
     options.run = True
     options.clean = True
+    # compile times dominate here, and TinyCC compiles far faster than
+    # gcc, so prefer it, unless some compiler was asked for explicitly
+    if options.compiler is None:
+        options.compiler = "tcc" if which("tcc") else "gcc"
+        logger.info("Using %s to compile C" % options.compiler)
+    # decide once, not on every line, whether ASTs need to be dumped
+    if options.dump_ast:
+        check = partial(parse_and_check, options=options)
+    else:
+        check = _parse_and_check
     while True:
         sys.stdout.write("> ")
         cmd = sys.stdin.readline().strip()
         if cmd == "quit":
             break
         try:
-            ast = parse_and_check(cmd, options=options)
+            ast = check(cmd)
             result = load_and_go(ast, options=options)
             sys.stdout.write(result)
         except Exception as e:
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+# Augmenting declarations used when parser.py is compiled with Cython
+# (see setup.py.)  parser.py itself remains plain, importable Python.
+
+cdef class Eightebed:
+    cdef public object typedecls, vardecls, block
+
+cdef class Block:
+    cdef public list stmts
+
+cdef class TypeDecl:
+    cdef public object name, type, _marker
+
+cdef class Type:
+    pass
+
+cdef class TypeVoid(Type):
+    pass
+
+cdef class TypeInt(Type):
+    pass
+
+cdef class TypeStruct(Type):
+    cdef public list members
+    cdef public object id, _c_name, _member_types
+
+cdef class TypePtr(Type):
+    cdef public object target
+
+cdef class TypeNamed(Type):
+    cdef public object name, _resolved
+
+cdef class Decl:
+    cdef public object type, name
+
+cdef class VarDecl:
+    cdef public object type, name, _marker_head, _marker_tail
+
+cdef class WhileStmt:
+    cdef public object expr, block
+
+cdef class IfStmt:
+    cdef public object expr, then, else_
+
+cdef class FreeStmt:
+    cdef public object ref
+
+cdef class PrintStmt:
+    cdef public object expr
+
+cdef class AssignStmt:
+    cdef public object ref, expr
+
+cdef class BinOpExpr:
+    cdef public object lhs, op, rhs, _c_op
+
+cdef class MallocExpr:
+    cdef public object type
+
+cdef class ValidExpr:
+    cdef public object expr
+
+cdef class DottedRef:
+    cdef public object source, member_name
+
+cdef class DeRef:
+    cdef public object source, _dest_type
+
+cdef class VarRef:
+    cdef public object name
+
+cdef class IntConst:
+    cdef public object value
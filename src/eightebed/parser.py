@@ -4,9 +4,18 @@
 Parser for the Eightebed programming language.
 """
 
+import itertools
 import logging
+import os
 import re
 
+try:
+    from sys import intern
+except ImportError:
+    # Python 2, which can only intern byte strings
+    def intern(name, intern=intern):
+        return intern(name) if isinstance(name, str) else name
+
 from .rooibos import (Stream, RegLexer,
                       Terminal, NonTerminal,
                       Alternation, Sequence, Asteration, Optional,
@@ -16,45 +25,24 @@ from .context import Context
 
 logger = logging.getLogger("parser")
 
+_IDENT_RE = re.compile(r'^[a-zA-Z]\w*$')
+_INT_RE = re.compile(r'^\d+$')
+
 
 class TypeError(RuntimeError):
     pass
 
 
-class Eightebed(object):
-    def __init__(self, data):
-        self.typedecls = data[0]
-        self.vardecls = data[1]
-        self.block = data[2]
-
-    def __repr__(self):
-        return "%s(%s, %s, %s)" % (
-            self.__class__.__name__,
-            repr(self.typedecls), repr(self.vardecls), repr(self.block)
-        )
-
-    def typecheck(self, types, vars):
-        for typedecl in self.typedecls:
-            typedecl.typecheck(types, vars)
-        for vardecl in self.vardecls:
-            vardecl.typecheck(types, vars)
-        self.block.typecheck(types, vars)
-
-    def vanalyze(self, context):
-        self.block.vanalyze(context)
-
-    def emit(self, stream, options):
-        stream.write("""\
+# Everything emitted before the program's own declarations.  Filled in
+# with the pedigree, the TRACE_MARKING switch, and the pointer format.
+_C_PREAMBLE = """\
 /* Achtung!  This Source was Automatically Generated by %s! */
 #include <stdlib.h>
 #include <stdio.h>
 #include <string.h>
 #include <assert.h>
 
-""" % options.pedigree)
-        if options.trace_marking:
-            stream.write("#define TRACE_MARKING 1\n")
-        stream.write("""\
+%s#define POINTER_FORMAT "%s"
 typedef struct _ptr {
   void *p;
   int valid;
@@ -90,7 +78,38 @@ static void _8ebed_free(_ptr *ptr) {
   _8ebed_invalidate(ptr);
 }
 
-""")
+"""
+
+
+class Eightebed(object):
+    __slots__ = ('typedecls', 'vardecls', 'block')
+
+    def __init__(self, data):
+        self.typedecls = data[0]
+        self.vardecls = data[1]
+        self.block = data[2]
+
+    def __repr__(self):
+        return "%s(%s, %s, %s)" % (
+            self.__class__.__name__,
+            repr(self.typedecls), repr(self.vardecls), repr(self.block)
+        )
+
+    def typecheck(self, types, vars):
+        for typedecl in self.typedecls:
+            typedecl.typecheck(types, vars)
+        for vardecl in self.vardecls:
+            vardecl.typecheck(types, vars)
+        self.block.typecheck(types, vars)
+
+    def vanalyze(self, context):
+        self.block.vanalyze(context)
+
+    def emit(self, stream, options):
+        stream.write(_C_PREAMBLE % (
+            options.pedigree,
+            "#define TRACE_MARKING 1\n" if options.trace_marking else "",
+            options.pointer_format))
         for typedecl in self.typedecls:
             typedecl.emit(stream, options)
         for vardecl in self.vardecls:
@@ -98,24 +117,28 @@ static void _8ebed_free(_ptr *ptr) {
         stream.write(r"""\
 static void _mark__root(_ptr outcast) {
 #ifdef TRACE_MARKING
-fprintf(stderr, "-> BEGIN marking %s @root\n", (long)outcast.p);
+fprintf(stderr, "-> BEGIN marking " POINTER_FORMAT " @root\n",
+        (long)outcast.p);
 #endif
-""" % options.pointer_format)
+""")
         for vardecl in self.vardecls:
             vardecl.emit_marker(stream)
         stream.write(r"""
 #ifdef TRACE_MARKING
-fprintf(stderr, "-> END marking %s @root\n", (long)outcast.p);
+fprintf(stderr, "-> END marking " POINTER_FORMAT " @root\n",
+        (long)outcast.p);
 #endif
 }
 
 int main(int argc, char **argv) {
-""" % options.pointer_format)
+""")
         self.block.emit(stream)
         stream.write("}\n")
 
 
 class Block(object):
+    __slots__ = ('stmts',)
+
     def __init__(self, data):
         self.stmts = data[1]
 
@@ -137,10 +160,17 @@ class Block(object):
             stmt.emit(stream)
 
 
+# Shared by every if statement written without an else clause.
+_EMPTY_BLOCK = Block(['{', [], '}'])
+
+
 class TypeDecl(object):
+    __slots__ = ('name', 'type', '_marker')
+
     def __init__(self, data):
         self.name = data[1]
         self.type = data[2]
+        self._marker = None
 
     def __repr__(self):
         return "TypeDecl(%s, %s)" % (repr(self.name), repr(self.type))
@@ -152,49 +182,59 @@ class TypeDecl(object):
             raise TypeError("Only structs may be named")
         return self.type
 
-    def emit(self, stream, options):
-        if isinstance(self.type, TypeStruct):
-            stream.write("typedef \n")
-            self.type.emit_forward(stream)
-            stream.write(" %s;\n" % self.name)
-            self.type.emit(stream)
-            stream.write(";\n")
-            stream.write("static void mark_%s(_ptr outcast, %s* p) {" %
-                         (self.name, self.name))
-            marking_text = (options.pointer_format + (" @%s " % self.name) +
-                            options.pointer_format)
-            stream.write(r"""
+    def _build_marker(self):
+        """Return the C text of the mark_ function for this struct type,
+        which invalidates aliases reachable through its pointer members.
+        The struct must have been type checked, so that every member
+        pointer is known to point to a named type."""
+        marking_text = '" POINTER_FORMAT " @%s " POINTER_FORMAT "' % (
+            self.name)
+        parts = [r""";
+static void mark_%s(_ptr outcast, %s* p) {
 #ifdef TRACE_MARKING
 fprintf(stderr, "-> BEGIN marking %s\n", (long)outcast.p, (long)p);
 #endif
-""" % marking_text)
-            for member in self.type.members:
-                if isinstance(member.type, TypePtr):
-                    stream.write("""
+""" % (self.name, self.name, marking_text)]
+        for member in self.type.members:
+            if isinstance(member.type, TypePtr):
+                pointee = member.type.points_to().name
+                parts.append("""
   if (_8ebed_is_alias(outcast, p->%s)) {
     _8ebed_invalidate(&p->%s);
   } else if (_8ebed_valid(p->%s)) {
-    mark_""" % (member.name, member.name, member.name))
-                    member.type.points_to().emit(stream)
-                    stream.write("(outcast, (")
-                    member.type.points_to().emit(stream)
-                    stream.write(" *)(p->%s.p));\n  }\n" % member.name)
-            stream.write(r"""
+    mark_%s(outcast, (%s *)(p->%s.p));
+  }
+""" % (member.name, member.name, member.name,
+                    pointee, pointee, member.name))
+        parts.append(r"""
 #ifdef TRACE_MARKING
 fprintf(stderr, "-> END marking %s\n", (long)outcast.p, (long)p);
 #endif
 }
+
 """ % marking_text)
+        return ''.join(parts)
+
+    def emit(self, stream, options):
+        if isinstance(self.type, TypeStruct):
+            stream.write("typedef \n")
+            self.type.emit_forward(stream)
+            stream.write(" %s;\n" % self.name)
+            self.type.emit(stream)
+            if self._marker is None:
+                self._marker = self._build_marker()
+            stream.write(self._marker)
         else:
             stream.write("typedef \n")
             self.type.emit(stream)
-            stream.write(" %s;\n" % self.name)
-        stream.write("\n")
+            stream.write(" %s;\n\n" % self.name)
 
 # These classes double as AST components and as type expressions.
 
 
 class Type(object):
+    __slots__ = ()
+
     def equiv(self, other):
         raise NotImplementedError
 
@@ -209,17 +249,21 @@ class Type(object):
 
 
 class TypeVoid(Type):
+    __slots__ = ()
+
     def __init__(self, data=None):
         pass
 
     def equiv(self, other):
-        return isinstance(other, TypeVoid)
+        return other is self or isinstance(other, TypeVoid)
 
     def emit(self, stream):
         stream.write("void")
 
 
 class TypeInt(Type):
+    __slots__ = ()
+
     def __init__(self, data=None):
         pass
 
@@ -230,21 +274,33 @@ class TypeInt(Type):
         return self
 
     def equiv(self, other):
-        return isinstance(other, TypeInt)
+        return other is self or isinstance(other, TypeInt)
 
     def emit(self, stream):
         stream.write("int")
 
 
-struct_id = 0
+# TypeVoid and TypeInt carry no state, so type checking shares these.
+_THE_VOID = TypeVoid()
+_THE_INT = TypeInt()
+
+
+_struct_ids = itertools.count()
+try:
+    _next_struct_id = _struct_ids.__next__
+except AttributeError:
+    # Python 2
+    _next_struct_id = _struct_ids.next
 
 
 class TypeStruct(Type):
+    __slots__ = ('members', 'id', '_c_name', '_member_types')
+
     def __init__(self, data):
-        global struct_id
         self.members = data[2]
-        self.id = struct_id
-        struct_id += 1
+        self.id = _next_struct_id()
+        self._c_name = "struct s_%s" % self.id
+        self._member_types = None
 
     def __repr__(self):
         return "%s(%s)" % (self.__class__.__name__, repr(self.members))
@@ -260,22 +316,26 @@ class TypeStruct(Type):
         return False
 
     def emit(self, stream):
-        stream.write("struct s_%s {\n" % self.id)
+        stream.write(self._c_name)
+        stream.write(" {\n")
         for member in self.members:
             member.emit(stream)
         stream.write("}")
 
     def emit_forward(self, stream):
-        stream.write("struct s_%s" % self.id)
+        stream.write(self._c_name)
 
     def get_member_type(self, name):
-        for decl in self.members:
-            if decl.name == name:
-                return decl.type
-        return None
+        if self._member_types is None:
+            # reversed, so that the first of any duplicate members wins
+            self._member_types = dict((decl.name, decl.type)
+                                      for decl in reversed(self.members))
+        return self._member_types.get(name)
 
 
 class TypePtr(Type):
+    __slots__ = ('target',)
+
     def __init__(self, data):
         self.target = data[2]
 
@@ -298,14 +358,15 @@ class TypePtr(Type):
     def emit(self, stream):
         stream.write("/* ")
         self.target.emit(stream)
-        stream.write("*")
-        stream.write(" */ ")
-        stream.write("_ptr")
+        stream.write("* */ _ptr")
 
 
 class TypeNamed(Type):
+    __slots__ = ('name', '_resolved')
+
     def __init__(self, data):
         self.name = data
+        self._resolved = None
 
     def __repr__(self):
         return "%s(%s)" % (self.__class__.__name__, repr(self.name))
@@ -320,10 +381,16 @@ class TypeNamed(Type):
         stream.write(self.name)
 
     def resolve(self, types):
-        return types.lookup(self.name)
+        # types can only be named at the top level, so once this name
+        # has been found, it will always resolve to the same type
+        if self._resolved is None:
+            self._resolved = types.lookup(self.name)
+        return self._resolved
 
 
 class Decl(object):
+    __slots__ = ('type', 'name')
+
     def __init__(self, data):
         self.type = data[0]
         self.name = data[1]
@@ -341,10 +408,20 @@ class Decl(object):
 
 
 class VarDecl(object):
+    __slots__ = ('type', 'name', '_marker_head', '_marker_tail')
+
     def __init__(self, data):
         decl = data[1]
         self.type = decl.type
         self.name = decl.name
+        if isinstance(self.type, TypePtr):
+            # the parts of the root marker that depend only on the name
+            self._marker_head = """
+  if (_8ebed_is_alias(outcast, %s)) {
+    _8ebed_invalidate(&%s);
+  } else if (_8ebed_valid(%s)) {
+    mark_""" % (self.name, self.name, self.name)
+            self._marker_tail = " *)%s.p);\n  }\n" % self.name
 
     def __repr__(self):
         return "%s(%r, %r)" % (self.__class__.__name__, self.name, self.type)
@@ -360,18 +437,16 @@ class VarDecl(object):
 
     def emit_marker(self, stream):
         if isinstance(self.type, TypePtr):
-            stream.write("""
-  if (_8ebed_is_alias(outcast, %s)) {
-    _8ebed_invalidate(&%s);
-  } else if (_8ebed_valid(%s)) {
-    mark_""" % (self.name, self.name, self.name))
+            stream.write(self._marker_head)
             self.type.points_to().emit(stream)
             stream.write("(outcast, (")
             self.type.points_to().emit(stream)
-            stream.write(" *)%s.p);\n  }\n" % self.name)
+            stream.write(self._marker_tail)
 
 
 class WhileStmt(object):
+    __slots__ = ('expr', 'block')
+
     def __init__(self, data):
         self.expr = data[1]
         self.block = data[2]
@@ -382,7 +457,7 @@ class WhileStmt(object):
     def typecheck(self, types, vars):
         self.expr.typecheck(types, vars)
         self.block.typecheck(types, vars)
-        return TypeVoid()
+        return _THE_VOID
 
     def vanalyze(self, context):
         self.expr.vanalyze(context)
@@ -397,6 +472,8 @@ class WhileStmt(object):
 
 
 class IfStmt(object):
+    __slots__ = ('expr', 'then', 'else_')
+
     def __init__(self, data):
         self.expr = data[1]
         self.then = data[2]
@@ -404,7 +481,7 @@ class IfStmt(object):
         if elsepart:
             self.else_ = elsepart[0][1]
         else:
-            self.else_ = Block(['{', [], '}'])
+            self.else_ = _EMPTY_BLOCK
 
     def __repr__(self):
         return "%s(%r, %r, %r)" % (self.__class__.__name__,
@@ -413,8 +490,9 @@ class IfStmt(object):
     def typecheck(self, types, vars):
         self.expr.typecheck(types, vars)
         self.then.typecheck(types, vars)
-        self.else_.typecheck(types, vars)
-        return TypeVoid()
+        if self.else_ is not _EMPTY_BLOCK:
+            self.else_.typecheck(types, vars)
+        return _THE_VOID
 
     def vanalyze(self, context):
         self.expr.vanalyze(context)
@@ -425,19 +503,23 @@ class IfStmt(object):
             if isinstance(self.expr.expr, VarRef):
                 subcontext[self.expr.expr.name] = True
         self.then.vanalyze(subcontext)
-        self.else_.vanalyze(context)
+        if self.else_ is not _EMPTY_BLOCK:
+            self.else_.vanalyze(context)
 
     def emit(self, stream):
         stream.write("if(")
         self.expr.emit(stream)
         stream.write(") {\n")
         self.then.emit(stream)
-        stream.write("} else {\n")
-        self.else_.emit(stream)
+        if self.else_ is not _EMPTY_BLOCK:
+            stream.write("} else {\n")
+            self.else_.emit(stream)
         stream.write("}\n")
 
 
 class FreeStmt(object):
+    __slots__ = ('ref',)
+
     def __init__(self, data):
         self.ref = data[1]
 
@@ -448,7 +530,7 @@ class FreeStmt(object):
         ref_type = self.ref.typecheck(types, vars)
         if ref_type.points_to() is None:
             raise TypeError("%r is not a pointer type" % ref_type)
-        return TypeVoid()
+        return _THE_VOID
 
     def vanalyze(self, context):
         self.ref.vanalyze(context)
@@ -462,6 +544,8 @@ class FreeStmt(object):
 
 
 class PrintStmt(object):
+    __slots__ = ('expr',)
+
     def __init__(self, data):
         self.expr = data[1]
 
@@ -470,9 +554,9 @@ class PrintStmt(object):
 
     def typecheck(self, types, vars):
         expr_type = self.expr.typecheck(types, vars)
-        if not expr_type.equiv(TypeInt()):
+        if not expr_type.equiv(_THE_INT):
             raise TypeError("%r is not an int" % expr_type)
-        return TypeVoid()
+        return _THE_VOID
 
     def vanalyze(self, context):
         self.expr.vanalyze(context)
@@ -484,6 +568,8 @@ class PrintStmt(object):
 
 
 class AssignStmt(object):
+    __slots__ = ('ref', 'expr')
+
     def __init__(self, data):
         self.ref = data[0]
         self.expr = data[2]
@@ -495,10 +581,11 @@ class AssignStmt(object):
         tlhs = self.ref.typecheck(types, vars)
         trhs = self.expr.typecheck(types, vars)
         if trhs.equiv(tlhs):
-            return TypeVoid()
+            return _THE_VOID
         else:
-            raise TypeError("%r (%r) not equivalent to %r (%r) for vars %s" %
-                            (tlhs, self.ref, trhs, self.expr, vars))
+            logger.debug("vars at mismatched assignment: %s", vars)
+            raise TypeError("%r (%r) not equivalent to %r (%r)" %
+                            (tlhs, self.ref, trhs, self.expr))
 
     def vanalyze(self, context):
         self.ref.vanalyze(context)
@@ -514,6 +601,8 @@ class AssignStmt(object):
 
 
 class BinOpExpr(object):
+    __slots__ = ('lhs', 'op', 'rhs', '_c_op')
+
     map = {
         '+': '+',
         '-': '-',
@@ -529,6 +618,7 @@ class BinOpExpr(object):
         self.lhs = data[1]
         self.op = data[2]
         self.rhs = data[3]
+        self._c_op = " %s " % self.map[self.op]
 
     def __repr__(self):
         return "%s(%r, %r, %r)" % (self.__class__.__name__,
@@ -537,11 +627,11 @@ class BinOpExpr(object):
     def typecheck(self, types, vars):
         trhs = self.lhs.typecheck(types, vars)
         tlhs = self.rhs.typecheck(types, vars)
-        if not tlhs.equiv(TypeInt()):
+        if not tlhs.equiv(_THE_INT):
             raise TypeError("lhs %r is not an int" % tlhs)
-        if not trhs.equiv(TypeInt()):
+        if not trhs.equiv(_THE_INT):
             raise TypeError("rhs %r is not an int" % trhs)
-        return TypeInt()
+        return _THE_INT
 
     def vanalyze(self, context):
         self.lhs.vanalyze(context)
@@ -550,12 +640,14 @@ class BinOpExpr(object):
     def emit(self, stream):
         stream.write("(")
         self.lhs.emit(stream)
-        stream.write(" %s " % self.map[self.op])
+        stream.write(self._c_op)
         self.rhs.emit(stream)
         stream.write(")")
 
 
 class MallocExpr(object):
+    __slots__ = ('type',)
+
     def __init__(self, data):
         self.type = data[1]
 
@@ -575,6 +667,8 @@ class MallocExpr(object):
 
 
 class ValidExpr(object):
+    __slots__ = ('expr',)
+
     def __init__(self, data):
         self.expr = data[1]
 
@@ -585,7 +679,7 @@ class ValidExpr(object):
         expr_type = self.expr.typecheck(types, vars)
         if expr_type.points_to() is None:
             raise TypeError("%r is not a pointer type" % expr_type)
-        return TypeInt()
+        return _THE_INT
 
     def vanalyze(self, context):
         self.expr.vanalyze(context)
@@ -597,6 +691,8 @@ class ValidExpr(object):
 
 
 class DottedRef(object):
+    __slots__ = ('source', 'member_name')
+
     def __init__(self, data):
         self.source = data[1]
         self.member_name = data[4]
@@ -623,6 +719,8 @@ class DottedRef(object):
 
 
 class DeRef(object):
+    __slots__ = ('source', '_dest_type')
+
     def __init__(self, data):
         self.source = data[1]
         self._dest_type = None
@@ -650,6 +748,8 @@ class DeRef(object):
 
 
 class VarRef(object):
+    __slots__ = ('name',)
+
     def __init__(self, data):
         self.name = data
 
@@ -672,6 +772,8 @@ class VarRef(object):
 
 
 class IntConst(object):
+    __slots__ = ('value',)
+
     def __init__(self, data):
         self.value = int(data)
 
@@ -679,7 +781,7 @@ class IntConst(object):
         return "%s(%s)" % (self.__class__.__name__, repr(self.value))
 
     def typecheck(self, types, vars):
-        return TypeInt()
+        return _THE_INT
 
     def vanalyze(self, context, deref=False):
         pass
@@ -740,30 +842,44 @@ g['Expr'] = Alternation(Sequence(Terminal('('), NonTerminal('Expr'),
                                  NonTerminal('Expr')).construct(ValidExpr),
                         NonTerminal('IntLit').construct(IntConst),
                         NonTerminal('Ref'))
-g['BinOp'] = Alternation(Terminal('+'), Terminal('-'), Terminal('*'),
-                         Terminal('/'), Terminal('='), Terminal('>'),
-                         Terminal('&'), Terminal('|'))
+g['BinOp'] = Terminal(frozenset(BinOpExpr.map).__contains__)
+
+g['TypeName'] = Terminal(_IDENT_RE.match).construct(intern)
+g['VarName'] = Terminal(_IDENT_RE.match).construct(intern)
+g['IntLit'] = Terminal(_INT_RE.match)
+g.precompute()
 
-g['TypeName'] = Terminal(lambda x: re.match('^[a-zA-Z]\w*$', x))
-g['VarName'] = Terminal(lambda x: re.match('^[a-zA-Z]\w*$', x))
-g['IntLit'] = Terminal(lambda x: re.match('^\d+$', x))
+
+_lexer = RegLexer()
+_lexer.ignore(r'\s+')
+_lexer.register(r'(\d+)')
+_lexer.register(r'(\(|\)|\[|\]|\;|\{|\}|\=|\+|\-|\*|\/|\,|\@|\.|\>|\&|\|)')
+_lexer.register(r'([a-zA-Z]\w*)')
 
 
 def parse(text):
-    r = RegLexer()
-    r.ignore(r'\s+')
-    r.register(r'(\d+)')
-    r.register(r'(\(|\)|\[|\]|\;|\{|\}|\=|\+|\-|\*|\/|\,|\@|\.|\>|\&|\|)')
-    r.register(r'([a-zA-Z]\w*)')
-    s = Stream(r(text))
+    s = Stream(_lexer(text))
     return g.parse('Eightebed', s)
 
 
+def read_file(filename):
+    """Return the contents of the named file, decoded as UTF-8.  Reads
+    until end of file, as pipes and the like report no size up front."""
+    fd = os.open(filename, os.O_RDONLY)
+    try:
+        chunks = []
+        size = os.fstat(fd).st_size or 65536
+        chunk = os.read(fd, size)
+        while chunk:
+            chunks.append(chunk)
+            chunk = os.read(fd, 65536)
+    finally:
+        os.close(fd)
+    return b''.join(chunks).decode('utf-8')
+
+
 def parse_file(filename):
-    f = open(filename, "r")
-    contents = f.read()
-    f.close()
-    return parse(contents)
+    return parse(read_file(filename))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+# Augmenting declarations used when rooibos.py is compiled with Cython
+# (see setup.py.)  rooibos.py itself remains plain, importable Python.
+
+cdef class Stream:
+    cdef public object generator, _token
+    cdef public bint _has
+
+    cpdef peek(self)
+    cpdef advance(self)
+
+cdef class PredicateSet:
+    cdef public object _literals, _predicates
+
+cdef class Production:
+    cdef public object constructor, _memo_generation
+    cdef public bint _inline_capture
+    cdef public dict _firsts_memo, _nullable_memo
+
+cdef class Terminal(Production):
+    cdef public object entity, _check
+
+cdef class Alternation(Production):
+    cdef public tuple alternatives
+    cdef public dict _dispatch_memo
+
+cdef class Sequence(Production):
+    cdef public tuple sequence
+
+cdef class Asteration(Production):
+    cdef public object production
+
+cdef class Optional(Production):
+    cdef public object production
+
+cdef class NonTerminal(Production):
+    cdef public object name
@@ -8,7 +8,9 @@ This work is hereby placed in the public domain.
 """
 
 import re
-import types
+
+from functools import partial
+from operator import eq
 
 
 class Stream(object):
@@ -36,35 +38,52 @@ class Stream(object):
     >>> s = Stream([1,2,3])
     >>> s.peek()
     1
+    >>> s = Stream(['cat','dog'])
+    >>> s.advance()
+    >>> s.peek()
+    'dog'
+    >>> s.advance()
+    >>> s.advance()
+    >>> s.peek() is None
+    True
 
     """
 
+    __slots__ = ('generator', '_has', '_token')
+
     def __init__(self, generator):
-        self.buffer = []
-        if isinstance(generator, types.GeneratorType):
-            self.generator = generator
-        else:
-            def g():
-                for x in generator:
-                    yield x
-            self.generator = g()
+        self.generator = iter(generator)
+        # the one token of look-ahead, if _has is set
+        self._has = False
+        self._token = None
 
     def peek(self):
-        if not self.buffer:
+        if not self._has:
             try:
-                self.buffer.append(next(self.generator))
+                self._token = next(self.generator)
             except StopIteration:
                 return None
-        return self.buffer[0]
+            self._has = True
+        return self._token
 
     def advance(self):
-        if not self.buffer:
-            self.buffer.extend(next(self.generator))
-        self.buffer.pop()
+        if self._has:
+            self._has = False
+            self._token = None
+        else:
+            try:
+                next(self.generator)
+            except StopIteration:
+                pass
+
+
+# Numeric backreferences and conditionals, which RegLexer cannot fuse.
+# An escaped backslash before a digit matches too, harmlessly.
+_NUMBERED_GROUP_REF = re.compile(r'\\[1-9]|\(\?\(\d')
 
 
 class RegLexer(object):
-    """
+    r"""
     An iterator which, given a string, returns a generator which returns
     sucessive prefixes of the string based on supplied regexes.
 
@@ -85,48 +104,157 @@ class RegLexer(object):
     >>> v
     [('integer', '12'), '(', ('integer', '34'), ')']
 
+    A long run of ignored text before something unlexable just ends
+    the tokens, promptly; and patterns may contain groups of their own.
+
+    >>> list(t("12" + " " * 100 + "!"))
+    [('integer', '12')]
+    >>> r = RegLexer()
+    >>> r.ignore(r'(#\S*)|\s+')
+    >>> r.register(r'\d+', 'int')
+    >>> r.register(r'([a-z])+', 'id')
+    >>> list(r('abc 12 #comment'))
+    [('id', 'abc'), ('int', '12')]
+
+    Patterns which cannot be fused into one regex still work.
+
+    >>> r = RegLexer()
+    >>> r.ignore(r'\s+')
+    >>> r.register(r'(\w)\1', 'double')
+    >>> r.register(r'\w')
+    >>> list(r('aab'))
+    [('double', 'aa'), 'b']
+    >>> r = RegLexer()
+    >>> r.ignore(r'\s+')
+    >>> r.register(r'(?i)if', 'if')
+    >>> r.register(r'[a-z]+', 'id')
+    >>> list(r('IF iffy'))
+    [('if', 'IF'), ('if', 'if'), ('id', 'fy')]
+    >>> r = RegLexer()
+    >>> r.register(r'(?P<n>\d+)', 'int')
+    >>> r.register(r'(?P<n>[a-z]+)', 'id')
+    >>> list(r('12ab'))
+    [('int', '12'), ('id', 'ab')]
+    >>> r = RegLexer()
+    >>> r.register(re.compile(r'if', re.IGNORECASE), 'if')
+    >>> r.register(r'[A-Z]+', 'ID')
+    >>> list(r('IFX'))
+    [('if', 'IF'), ('ID', 'X')]
+
     """
 
     def __init__(self):
-        self.text = ""
         self.patterns = []
         self.ignoring = []
+        self._lex = None
+        self._token = None
+        self._metas = None
+        self._skip = None
+
+    def _compile(self):
+        """Fuse the registered patterns into one regex, so that each token
+        costs a single match, and likewise for the ignored patterns.  The
+        regex engine tries the alternatives in order, so the first pattern
+        registered still wins, as it did when they were tried one by one.
+        The ignored patterns are kept in a regex of their own: prefixed
+        to the token regex, a run of ignored text before something which
+        nothing matches would be backtracked through exponentially.
+
+        Not every set of patterns can be fused: a pattern may carry flags
+        (inline, or given when it was precompiled) that would then apply
+        to all of them, refer back to its own groups by number, or share
+        a group name with another.  Those are lexed by trying each of the
+        patterns in turn, as they were compiled.
+        """
+        self._lex = self._lex_each
+        if not self.patterns:
+            return
+        plain = re.compile('').flags
+        for pattern in [p for (p, meta) in self.patterns] + self.ignoring:
+            if pattern.flags != plain:
+                return
+            # group numbers shift once fused, and not always into an error
+            if pattern.groups and _NUMBERED_GROUP_REF.search(pattern.pattern):
+                return
+        alternatives = []
+        metas = {}
+        group = 1
+        for (pattern, meta) in self.patterns:
+            alternatives.append('(%s)' % pattern.pattern)
+            metas[group] = meta
+            group += 1 + pattern.groups
+        try:
+            token = re.compile('|'.join(alternatives))
+            skip = None
+            if self.ignoring:
+                skip = re.compile('(?:%s)*' % '|'.join(
+                    '(?:%s)' % pattern.pattern for pattern in self.ignoring))
+        except re.error:
+            return
+        self._token = token
+        self._metas = metas
+        self._skip = skip
+        self._lex = self._lex_fused
 
     def __call__(self, text):
-        self.text = text
-        has_match = True
-        while has_match:
-            has_match = False
-            has_ignore = True
-
-            while has_ignore:
-                has_ignore = False
-                for pattern in self.ignoring:
-                    result = re.match(pattern, self.text)
-                    if result:
-                        self.text = self.text[result.end():]
-                        has_ignore = True
+        if self._lex is None:
+            self._compile()
+        return self._lex(text)
+
+    def _lex_fused(self, text):
+        # The position is kept local to each generator, so one RegLexer
+        # may be lexing several strings at once.
+        token = self._token.match
+        skip = self._skip.match if self._skip is not None else None
+        metas = self._metas
+        pos = 0
+        while True:
+            if skip is not None:
+                pos = skip(text, pos).end()
+            result = token(text, pos)
+            if result is None:
+                return
+            pos = result.end()
+            # the group wrapping the pattern that matched closes last
+            meta = metas[result.lastindex]
+            if meta is not None:
+                yield meta, result.group()
+            else:
+                yield result.group()
+
+    def _lex_each(self, text):
+        patterns = self.patterns
+        ignoring = self.ignoring
+        pos = 0
+        while True:
+            skipped = True
+            while skipped:
+                skipped = False
+                for pattern in ignoring:
+                    result = pattern.match(text, pos)
+                    if result is not None and result.end() > pos:
+                        pos = result.end()
+                        skipped = True
                         break
-
-            for (pattern, meta) in self.patterns:
-                result = re.match(pattern, self.text)
-                if result:
-                    self.text = self.text[result.end():]
-                    has_match = True
+            for (pattern, meta) in patterns:
+                result = pattern.match(text, pos)
+                if result is not None:
                     break
-
-            if has_match:
-                if meta is not None:
-                    yield meta, result.group()
-                else:
-                    yield result.group()
+            else:
+                return
+            pos = result.end()
+            if meta is not None:
+                yield meta, result.group()
+            else:
+                yield result.group()
 
     def register(self, pattern, meta=None):
-        self.patterns.append((pattern, meta))
+        self.patterns.append((re.compile(pattern), meta))
+        self._lex = None
 
     def ignore(self, pattern):
-        self.ignoring.append(pattern)
-
+        self.ignoring.append(re.compile(pattern))
+        self._lex = None
 
 class PredicateSet(object):
     """
@@ -152,65 +280,239 @@ class PredicateSet(object):
     True
     >>> 1 in s
     True
+    >>> s = PredicateSet('a').freeze()
+    >>> 'a' in s
+    True
+    >>> s.add('b')
+    Traceback (most recent call last):
+    ...
+    TypeError: cannot add to a frozen PredicateSet
 
     """
     def __init__(self, *contents):
-        self._set = set()
+        # Plain entities are kept in a real set, so that testing for them
+        # is a hash probe; only true predicates need to be called.
+        self._literals = set()
+        self._predicates = []
         self.update(contents)
 
     def add(self, entity):
+        if isinstance(self._literals, frozenset):
+            raise TypeError("cannot add to a frozen PredicateSet")
         if callable(entity):
-            self._set.add(entity)
+            if entity not in self._predicates:
+                self._predicates.append(entity)
         else:
-            self._set.add(lambda x: x == entity)
+            try:
+                self._literals.add(entity)
+            except TypeError:
+                # unhashable, so it can only be compared against
+                self._predicates.append(lambda x: x == entity)
 
     def update(self, iterable):
         for x in iterable:
             self.add(x)
 
+    def freeze(self):
+        """Make this set immutable, and return it."""
+        self._literals = frozenset(self._literals)
+        self._predicates = tuple(self._predicates)
+        return self
+
     def __contains__(self, other):
-        for x in self._set:
+        try:
+            if other in self._literals:
+                return True
+        except TypeError:
+            pass
+        for x in self._predicates:
             if x(other):
                 return True
         return False
 
     def __iter__(self):
-        for x in self._set:
+        for x in self._literals:
+            yield x
+        for x in self._predicates:
             yield x
 
     def __repr__(self):
-        return "PredicateSet(%r)" % self._set
+        return "PredicateSet(%r)" % (list(self),)
 
 
 ### Productions ###
 
 
+class _Result(object):
+    """Yielded by a production's _steps() generator, last of all, to hand
+    its result back to _drive()."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+# Whether each class of production met by _drive() overrides parse(),
+# and so must be parsed by calling that, rather than by its _steps().
+_parses_itself = {}
+
+
+def _drive(production, stream, grammar):
+    """Parse the stream with the given production.  Each production in
+    progress is a _steps() generator kept on an explicit stack, rather
+    than a frame on Python's call stack, so nesting in the input is not
+    limited by the recursion limit.  Productions which override parse(),
+    such as Terminal, are parsed on the spot by calling it.
+    """
+    stack = []
+    steps = production._steps(stream, grammar)
+    value = None
+    while True:
+        request = steps.send(value)
+        if request.__class__ is _Result:
+            value = request.value
+            if not stack:
+                return value
+            steps = stack.pop()
+            continue
+        # a plain NonTerminal which constructs nothing can be skipped over
+        while (request.__class__ is NonTerminal and
+               request.constructor is None):
+            request = request._production(grammar)
+        cls = request.__class__
+        try:
+            leaf = _parses_itself[cls]
+        except KeyError:
+            leaf = _parses_itself[cls] = cls.parse != Production.parse
+        if leaf:
+            value = request.parse(stream, grammar=grammar)
+        else:
+            stack.append(steps)
+            steps = request._steps(stream, grammar)
+            value = None
+
 class Production(object):
-    constructor = None
+    """
+    Subclasses need not call Production's __init__, and may override
+    just parse(), to match a single token, in place of _steps().
+
+    >>> class Cat(Production):
+    ...     def __init__(self):
+    ...         pass
+    ...     def parse(self, stream, grammar=None):
+    ...         if stream.peek() == 'cat':
+    ...             stream.advance()
+    ...             return 'CAT'
+    >>> Sequence(Cat(), Terminal('dog')).parse(Stream(['cat', 'dog']))
+    ['CAT', 'dog']
+    >>> class Upper(Sequence):
+    ...     def parse(self, stream, grammar=None):
+    ...         return [x.upper() for x in
+    ...                 Sequence.parse(self, stream, grammar=grammar)]
+    >>> p = Sequence(Upper(Terminal('a'), Terminal('b')), Terminal('c'))
+    >>> p.parse(Stream(['a', 'b', 'c']))
+    [['A', 'B'], 'c']
+    >>> class Shout(Terminal):
+    ...     def capture(self, obj, grammar=None):
+    ...         return obj.upper() + '!'
+    >>> Sequence(Shout('a'), Terminal('b')).parse(Stream(['a', 'b']))
+    ['A!', 'b']
+    >>> class Count(Sequence):
+    ...     def capture(self, obj, grammar=None):
+    ...         return len(obj)
+    >>> Count(Terminal('a'), Terminal('b')).parse(Stream(['a', 'b']))
+    2
+    >>> class Neither(Production):
+    ...     pass
+    >>> Neither().parse(Stream(['cat']))
+    Traceback (most recent call last):
+    ...
+    NotImplementedError
+    """
+
+    def __init__(self):
+        self.constructor = None
+        self._memo_generation = None
+        self._inline_capture = type(self).capture == Production.capture
 
     def parse(self, stream, grammar=None):
-        """Subclasses should override this."""
-        raise NotImplementedError
+        return _drive(self, stream, grammar)
+
+    def _steps(self, stream, grammar):
+        """Subclasses should override this, or parse() if they match a
+        single token.  A generator which yields each production it needs
+        parsed, is sent back that production's result, and finally yields
+        its own result wrapped in a _Result."""
+        if type(self).parse == Production.parse:
+            # overriding neither would have parse() and this call each other
+            raise NotImplementedError
+        yield _Result(self.parse(stream, grammar=grammar))
 
     def construct(self, constructor):
         self.constructor = constructor
+        self._inline_capture = type(self).capture == Production.capture
         return self
 
+    # Unless a subclass overrides this, the parse methods inline it, so
+    # that the common case of there being no constructor costs no method
+    # call.  Whether it is overridden is decided once, by __init__() and
+    # construct(); until then, it is called.
     def capture(self, obj, grammar=None):
         if self.constructor is None:
             return obj
         else:
             return self.constructor(obj)
 
+    def _forget(self):
+        self._memo_generation = Grammar.generation
+        self._firsts_memo = {}
+        self._nullable_memo = {}
+
     def firsts(self, grammar=None):
+        """Return the set of tokens which can begin this production.
+        This is fixed for a given grammar, so it is computed only once,
+        and again only if some grammar has since been changed."""
+        if self._memo_generation != Grammar.generation:
+            self._forget()
+        try:
+            return self._firsts_memo[grammar]
+        except KeyError:
+            # frozen, since the same set is handed to every caller
+            f = self._firsts_memo[grammar] = self._firsts(grammar).freeze()
+            return f
+
+    def is_nullable(self, grammar=None):
+        """Return whether this production can match no tokens at all.
+        Memoized just as firsts() is."""
+        if self._memo_generation != Grammar.generation:
+            self._forget()
+        try:
+            return self._nullable_memo[grammar]
+        except KeyError:
+            n = self._nullable_memo[grammar] = self._is_nullable(grammar)
+            return n
+
+    def _firsts(self, grammar):
         """Subclasses should override this."""
         return PredicateSet()
 
-    def is_nullable(self, grammar=None):
+    def _is_nullable(self, grammar):
         """Subclasses should override this."""
         return False
 
 
+try:
+    # Defaults for subclasses whose __init__ does not call Production's.
+    # When compiled with Cython, Production is an extension type whose
+    # declared attributes already start out as None, and which does not
+    # allow this assignment.
+    Production.constructor = None
+    Production._memo_generation = None
+    Production._inline_capture = False
+except (TypeError, AttributeError):
+    pass
+
+
 class Terminal(Production):
     """
     >>> t = Terminal('cat')
@@ -230,22 +532,30 @@ class Terminal(Production):
     """
 
     def __init__(self, entity):
+        Production.__init__(self)
         self.entity = entity
+        # decided once here, rather than on every token
+        if callable(entity):
+            self._check = entity
+        else:
+            self._check = partial(eq, entity)
 
     def check_entity(self, against):
-        if callable(self.entity):
-            return self.entity(against)
-        else:
-            return against == self.entity
+        return self._check(against)
 
     def parse(self, stream, grammar=None):
-        if self.check_entity(stream.peek()):
-            result = self.capture(stream.peek(), grammar=grammar)
+        token = stream.peek()
+        if self._check(token):
+            if self._inline_capture:
+                constructor = self.constructor
+                result = token if constructor is None else constructor(token)
+            else:
+                result = self.capture(token, grammar=grammar)
             stream.advance()
             return result
         return None
 
-    def firsts(self, grammar=None):
+    def _firsts(self, grammar):
         return PredicateSet(self.entity)
 
 
@@ -265,25 +575,82 @@ class Alternation(Production):
     >>> s = Stream(['horse'])
     >>> a.parse(s) is None
     True
+    >>> a = Alternation(Terminal(lambda x: x.startswith('c')).construct(len),
+    ...                 Terminal('cat'), Terminal('dog'))
+    >>> a.parse(Stream(['cat']))
+    3
+    >>> a.parse(Stream(['dog']))
+    'dog'
     """
 
     def __init__(self, *alternatives):
+        Production.__init__(self)
         self.alternatives = alternatives
 
-    def parse(self, stream, grammar=None):
-        for alternative in self.alternatives:
-            if stream.peek() in alternative.firsts(grammar=grammar):
-                result = alternative.parse(stream, grammar=grammar)
-                return self.capture(result, grammar=grammar)
-        return None
+    def _forget(self):
+        Production._forget(self)
+        self._dispatch_memo = {}
+
+    def _dispatch(self, grammar):
+        """Return a dict mapping each literal token which can begin one of
+        the alternatives to the alternative chosen for it, along with the
+        alternatives (in order) whose first sets contain predicates, for
+        any token not in the dict.  Memoized just as firsts() is."""
+        if self._memo_generation != Grammar.generation:
+            self._forget()
+        try:
+            return self._dispatch_memo[grammar]
+        except KeyError:
+            pass
+        firsts = [(alternative.firsts(grammar=grammar), alternative)
+                  for alternative in self.alternatives]
+        table = {}
+        for (f, _) in firsts:
+            for literal in f._literals:
+                if literal in table:
+                    continue
+                # an earlier alternative's predicate may claim it first
+                for (g, alternative) in firsts:
+                    if literal in g:
+                        table[literal] = alternative
+                        break
+        fallbacks = [(f, alternative) for (f, alternative) in firsts
+                     if f._predicates]
+        d = self._dispatch_memo[grammar] = (table, fallbacks)
+        return d
+
+    def _steps(self, stream, grammar):
+        (table, fallbacks) = self._dispatch(grammar)
+        token = stream.peek()
+        try:
+            alternative = table.get(token)
+        except TypeError:
+            # unhashable, so it can only be matched by a predicate
+            alternative = None
+        if alternative is None:
+            for (f, candidate) in fallbacks:
+                if token in f:
+                    alternative = candidate
+                    break
+            else:
+                yield _Result(None)
+                return
+        result = yield alternative
+        if self._inline_capture:
+            constructor = self.constructor
+            if constructor is not None:
+                result = constructor(result)
+        else:
+            result = self.capture(result, grammar=grammar)
+        yield _Result(result)
 
-    def firsts(self, grammar=None):
+    def _firsts(self, grammar):
         f = PredicateSet()
         for alternative in self.alternatives:
             f.update(alternative.firsts(grammar=grammar))
         return f
 
-    def is_nullable(self, grammar=None):
+    def _is_nullable(self, grammar):
         for alternative in self.alternatives:
             if alternative.is_nullable(grammar=grammar):
                 return True
@@ -306,21 +673,31 @@ class Sequence(Production):
     """
 
     def __init__(self, *sequence):
+        Production.__init__(self)
         self.sequence = sequence
 
-    def parse(self, stream, grammar=None):
+    def _steps(self, stream, grammar):
         results = []
+        append = results.append
         for component in self.sequence:
-            result = component.parse(stream, grammar=grammar)
+            result = yield component
             if result is None:
-                results = None
-                break
-            results.append(result)
-        if results is not None:
-            return self.capture(results, grammar=grammar)
-        return None
-
-    def firsts(self, grammar=None):
+                yield _Result(None)
+                return
+            append(result)
+        if self._inline_capture:
+            constructor = self.constructor
+            if constructor is not None:
+                results = constructor(results)
+        else:
+            results = self.capture(results, grammar=grammar)
+        yield _Result(results)
+
+    def _firsts(self, grammar):
+        # Usually the first component cannot be empty, and its first set
+        # can be shared outright, without building a union.
+        if self.sequence and not self.sequence[0].is_nullable(grammar=grammar):
+            return self.sequence[0].firsts(grammar=grammar)
         f = PredicateSet()
         for component in self.sequence:
             f.update(component.firsts(grammar=grammar))
@@ -328,7 +705,7 @@ class Sequence(Production):
                 break
         return f
 
-    def is_nullable(self, grammar=None):
+    def _is_nullable(self, grammar):
         for component in self.sequence:
             if not component.is_nullable(grammar=grammar):
                 return False
@@ -368,21 +745,33 @@ class Asteration(Production):
     """
 
     def __init__(self, production):
+        Production.__init__(self)
         self.production = production
 
-    def parse(self, stream, grammar=None):
+    def _steps(self, stream, grammar):
         results = []
-        while stream.peek() in self.production.firsts(grammar=grammar):
-            result = self.production.parse(stream, grammar=grammar)
+        append = results.append
+        peek = stream.peek
+        production = self.production
+        # the first set cannot change while we loop, so look it up once
+        firsts = production.firsts(grammar=grammar)
+        while peek() in firsts:
+            result = yield production
             if result is None:
                 break
-            results.append(result)
-        return self.capture(results, grammar=grammar)
+            append(result)
+        if self._inline_capture:
+            constructor = self.constructor
+            if constructor is not None:
+                results = constructor(results)
+        else:
+            results = self.capture(results, grammar=grammar)
+        yield _Result(results)
 
-    def firsts(self, grammar=None):
+    def _firsts(self, grammar):
         return self.production.firsts(grammar=grammar)
 
-    def is_nullable(self, grammar=None):
+    def _is_nullable(self, grammar):
         return True
 
 
@@ -399,25 +788,34 @@ class Optional(Production):
     """
 
     def __init__(self, production):
+        Production.__init__(self)
         self.production = production
 
-    def parse(self, stream, grammar=None):
+    def _steps(self, stream, grammar):
         results = []
-        if stream.peek() in self.production.firsts(grammar=grammar):
-            result = self.production.parse(stream, grammar=grammar)
+        production = self.production
+        if stream.peek() in production.firsts(grammar=grammar):
+            result = yield production
             if result is not None:
                 results.append(result)
-        return self.capture(results, grammar=grammar)
+        if self._inline_capture:
+            constructor = self.constructor
+            if constructor is not None:
+                results = constructor(results)
+        else:
+            results = self.capture(results, grammar=grammar)
+        yield _Result(results)
 
-    def firsts(self, grammar=None):
+    def _firsts(self, grammar):
         return self.production.firsts(grammar=grammar)
 
-    def is_nullable(self, grammar=None):
+    def _is_nullable(self, grammar):
         return True
 
 
 class NonTerminal(Production):
     def __init__(self, name):
+        Production.__init__(self)
         self.name = name
 
     def _production(self, grammar):
@@ -425,14 +823,20 @@ class NonTerminal(Production):
             raise TypeError("need grammar to use NonTerminal")
         return grammar[self.name]
 
-    def parse(self, stream, grammar=None):
-        result = self._production(grammar).parse(stream, grammar=grammar)
-        return self.capture(result, grammar=grammar)
+    def _steps(self, stream, grammar):
+        result = yield self._production(grammar)
+        if self._inline_capture:
+            constructor = self.constructor
+            if constructor is not None:
+                result = constructor(result)
+        else:
+            result = self.capture(result, grammar=grammar)
+        yield _Result(result)
 
-    def firsts(self, grammar=None):
+    def _firsts(self, grammar):
         return self._production(grammar).firsts(grammar=grammar)
 
-    def is_nullable(self, grammar=None):
+    def _is_nullable(self, grammar):
         return self._production(grammar).is_nullable(grammar=grammar)
 
 
@@ -455,10 +859,17 @@ class Grammar(object):
     True
     >>> g.parse('Expr', Stream(['(','(',')'])) is None
     True
+    >>> s = Stream(['('] * 5000 + [')'] * 5000)
+    >>> g.parse('Expr', s) is not None
+    True
     """
 
     trace = False
 
+    # Bumped whenever any grammar changes, which discards every memoized
+    # firsts() and is_nullable() result.
+    generation = 0
+
     def __init__(self, parent=None):
         self.productions = {}
         self.parent = parent
@@ -476,6 +887,14 @@ class Grammar(object):
 
     def __setitem__(self, key, value):
         self.productions[key] = value
+        Grammar.generation += 1
+
+    def precompute(self):
+        """Compute the first sets and nullability of every production
+        up front, rather than on first use during a parse."""
+        for production in self.productions.values():
+            production.firsts(grammar=self)
+            production.is_nullable(grammar=self)
 
     def parse(self, name, stream):
         return self[name].parse(stream, grammar=self)
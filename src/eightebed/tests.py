@@ -375,6 +375,11 @@ class Tests(object):
 """
 
 
+# The test programs above, by name, for looking up @testprog inputs.
+programs = dict((name, source) for (name, source) in vars(Tests).items()
+                if not name.startswith('_'))
+
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
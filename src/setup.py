@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Optional build script for the Eightebed reference implementation.
+
+8ebed2c.py runs perfectly well as plain Python.  If Cython is available,
+this compiles selected modules of the eightebed package to C extension
+modules, which Python will then import in preference to the .py files:
+
+    cd src && python setup.py build_ext --inplace
+"""
+
+import sys
+
+from setuptools import setup
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    sys.exit("Cython is needed to run this build script, but only this "
+             "optional build;\n8ebed2c.py runs as plain Python without it.")
+
+
+setup(
+    name="eightebed",
+    packages=["eightebed"],
+    ext_modules=cythonize(["eightebed/context.py",
+                           "eightebed/parser.py",
+                           "eightebed/rooibos.py"],
+                          language_level=3),
+)